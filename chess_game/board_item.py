@@ -6,7 +6,8 @@ import chess
 import numpy as np
 import heapq
 import random
-from collections import deque
+import copy
+import threading
 import queue
 import sounddevice as sd
 import json
@@ -33,6 +34,76 @@ NUMBER_MAP = {
     "eight": "8"
 }
 
+# python chess piece type for each promotion letter
+PROMOTION_PIECE_TYPES = {'Q': chess.QUEEN, 'R': chess.ROOK, 'B': chess.BISHOP, 'N': chess.KNIGHT}
+
+# piece symbol indexed as PIECE_SYMBOLS[is_white][piece_type], python chess piece types run from 1 to 6
+PIECE_SYMBOLS = (
+    [None] + [chess.piece_symbol(pt) for pt in chess.PIECE_TYPES],
+    [None] + [chess.piece_symbol(pt).upper() for pt in chess.PIECE_TYPES],
+)
+
+# square index for every (rank, file) pair, indexed as SQUARES[rank][file]
+SQUARES = [[chess.square(file, rank) for file in range(8)] for rank in range(8)]
+
+# state board row and column for every square, rank 8 is row 1 and file a is column 2
+SQUARE_STATE_ROWS = np.array([8 - (sq >> 3) for sq in range(64)])
+SQUARE_STATE_COLS = np.array([(sq & 7) + 2 for sq in range(64)])
+
+# node grid (row, col) for every square, each state board cell lands on node (row * 2, col * 2)
+SQUARE_NODES = [((8 - (sq >> 3)) * 2, ((sq & 7) + 2) * 2) for sq in range(64)]
+
+# the 8 node steps a piece can take during a star search, orthogonal steps first
+NEIGHBOR_STEPS = ((-1,0),(1,0),(0,-1),(0,1),(-1,-1),(-1,1),(1,-1),(1,1))
+
+# display_paths marker for each labeled step of a path sequence
+PATH_MARKERS = {
+    'move':'M','capture':'C','promotion_pawn':'P',
+    'promotion_piece':'X','promotion_pawn_final':'P',
+    'castle_king':'K','castle_rook':'R'
+}
+
+# passability of a grid cell indexed by the code point of its first character, 1 for '.' (empty node)
+# and the digits that start capture space labels, 0 for every piece letter
+PASSABLE_CODES = np.zeros(128, dtype=np.uint8)
+PASSABLE_CODES[ord('.')] = 1
+PASSABLE_CODES[ord('0'):ord('9') + 1] = 1
+
+# number of a star results kept for reuse, the least recently used result is dropped past this
+PATH_CACHE_SIZE = 256
+
+# number of planned moves kept for reuse across games, the least recently used plan is dropped past this
+PLAN_CACHE_SIZE = 4096
+
+# starting state board squares for each type of piece, used to know where each should reset
+STARTING_POSITIONS = {
+    'R': [(8,2), (8,9), (2,0), (9,0)],
+    'N': [(8,3), (8,8), (1,0), (8,0)],
+    'B': [(8,4), (8,7), (0,0), (7,0)],
+    'Q': [(8,5), (3,0), (4,0), (5,0), (6,0)],
+    'K': [(8,6)],
+    'P': [(7,c) for c in range(2,10)],
+
+    'r': [(1,2), (1,9), (2,11), (9,11)],
+    'n': [(1,3), (1,8), (1,11), (8,11)],
+    'b': [(1,4), (1,7), (0,11), (7,11)],
+    'q': [(1,5), (3,11), (4,11), (5,11), (6,11)],
+    'k': [(1,6)],
+    'p': [(2,c) for c in range(2,10)],
+}
+
+# the same layout as a 10×12 state board, with the piece that belongs on each starting square and '.' everywhere else
+START_LAYOUT = np.full((10, 12), '.', dtype='<U2')
+for _piece, _squares in STARTING_POSITIONS.items():
+    for _sq in _squares:
+        START_LAYOUT[_sq] = _piece
+del _piece, _squares, _sq
+
+# squares that can ever hold a displaced piece during a reset: not a starting position and not a promotion space
+RESET_CANDIDATE_MASK = START_LAYOUT == '.'
+RESET_CANDIDATE_MASK[:, [0, 11]] = False
+RESET_CANDIDATE_SET = frozenset(zip(*(idx.tolist() for idx in np.nonzero(RESET_CANDIDATE_MASK))))
+
 class BoardItem:
     """
     combined logical and physical chessboard representation for a robot-controlled
@@ -84,10 +155,18 @@ class BoardItem:
         display_paths(path_seq):
             visualize planned a star paths by overlaying markers on the node grid
 
+        generate_gcode_lines(path_seq, node_spacing=1.0):
+            yield the G-code for a path sequence one line at a time so it can be streamed to the gantry
+
         generate_gcode(path_seq, node_spacing=1.0):
             convert a path sequence into a formatted G-code program suitable for the gantry
     """
 
+    # recently planned moves keyed by (uci, state board bytes), oldest use first
+    # shared by every board so plans carry over between games, with a lock since premade games plan on a thread
+    _plan_cache = {}
+    _plan_cache_lock = threading.Lock()
+
     def __init__(self):
         """
         initialize the instance attributes for a chess game
@@ -99,20 +178,72 @@ class BoardItem:
         self.chess_board = chess.Board()
 
         # physical state (10×12)
+        # cells hold piece symbols, '.' or capture slot numbers up to '16', so a fixed 2 character
+        # unicode dtype stores them unboxed and keeps comparisons inside numpy
         self.state_rows = 10
         self.state_cols = 12
-        self.state_board = np.full((self.state_rows, self.state_cols), '.', dtype=object)
+        self.state_board = np.full((self.state_rows, self.state_cols), '.', dtype='<U2')
 
         # node grid (19×23)
         self.node_rows = 19
         self.node_cols = 23
-        self.node_grid = np.full((self.node_rows, self.node_cols), '.', dtype=object)
+        self.node_grid = np.full((self.node_rows, self.node_cols), '.', dtype='<U2')
+        # scratch copy of the node grid that display_paths draws its markers on, allocated once and reused
+        self._vis_buf = np.empty_like(self.node_grid)
+        # in-bounds a star neighbors of every node on the flattened node grid, index (r, c) as r * node_cols + c
+        # each entry is (neighbor index, sides) where sides holds the indices of the 2 orthogonal nodes
+        # a diagonal step squeezes between, and is empty for orthogonal steps
+        # these only depend on the grid shape, so bounds and offsets are worked out once instead of on every expansion
+        self._neighbor_table = []
+        for r in range(self.node_rows):
+            for c in range(self.node_cols):
+                entries = []
+                for dr, dc in NEIGHBOR_STEPS:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < self.node_rows and 0 <= nc < self.node_cols:
+                        sides = ()
+                        if dr and dc:
+                            sides = (r*self.node_cols + nc, nr*self.node_cols + c)
+                        entries.append((nr*self.node_cols + nc, sides))
+                self._neighbor_table.append(tuple(entries))
+        # scratch tables for the a star search, reset in place at the start of every search instead of reallocated
+        # the reset copies come from the fixed templates, which are a single c level copy each
+        node_count = self.node_rows * self.node_cols
+        self._astar_unreached = [node_count] * node_count # template, larger than any real path cost
+        self._astar_zeros = bytes(node_count) # template, nothing expanded yet
+        self._astar_best_g = list(self._astar_unreached)
+        self._astar_came_from = [-1] * node_count
+        self._astar_closed = bytearray(node_count)
+        self._astar_open = bytearray(node_count)
+        # row and column of every flat node index, and the heuristic of every node toward each goal seen so far
+        self._node_row_of, self._node_col_of = np.divmod(np.arange(node_count), self.node_cols)
+        self._heuristic_tables = {}
+        # recent a star results keyed by (start, goal, blocked node, passability), oldest use first
+        self._path_cache = {}
+        # the last parsed move as (uci, (move, moving piece, destination piece)), cleared whenever the board changes
+        self._parsed_move = None
+        # in-bounds orthogonal neighbors of every node for the reset path search, as flat indices like the table above
+        # these only depend on the grid shape, so they are worked out once instead of on every expansion
+        self._orth_neighbors = [
+            tuple(
+                (r + dr)*self.node_cols + c + dc
+                for dr, dc in NEIGHBOR_STEPS[:4]
+                if 0 <= r + dr < self.node_rows and 0 <= c + dc < self.node_cols
+            )
+            for r in range(self.node_rows)
+            for c in range(self.node_cols)
+        ]
 
         # preallocated capture square indices
         self.black_captures = [(3,1),(2,1),(1,1),(0,1),(0,2),(0,3),(0,4),(0,5),
                                (0,6),(0,7),(0,8),(0,9),(0,10),(1,10),(2,10),(3,10)]
         self.white_captures = [(6,1),(7,1),(8,1),(9,1),(9,2),(9,3),(9,4),(9,5),
                                (9,6),(9,7),(9,8),(9,9),(9,10),(8,10),(7,10),(6,10)]
+        # the same slots split into row and column index arrays so they can be filled with one fancy-indexed write
+        self._black_cap_rows, self._black_cap_cols = np.array(self.black_captures).T
+        self._white_cap_rows, self._white_cap_cols = np.array(self.white_captures).T
+        # the number displayed in each empty capture slot
+        self._cap_labels = np.array([str(i+1) for i in range(len(self.black_captures))], dtype='<U2')
 
         # storage lists for captured pieces
         self.captured_white = []
@@ -121,6 +252,14 @@ class BoardItem:
         # starting promotion piece layout order
         self.white_promos = ['B','N','R','Q','Q','Q','Q','B','N','R']
         self.black_promos = ['b','n','r','q','q','q','q','b','n','r']
+        # the lane rows still holding each promotion piece type for each color, in lane order,
+        # so a promotion takes the first remaining piece without scanning the lane
+        self._promo_slots = {}
+        for color, promos in ((chess.WHITE, self.white_promos), (chess.BLACK, self.black_promos)):
+            slots = {}
+            for i, p in enumerate(promos):
+                slots.setdefault(p.upper(), []).append(i)
+            self._promo_slots[color] = slots
 
         # set up the various board representations
         self._populate_state_board()
@@ -143,43 +282,35 @@ class BoardItem:
         self.state_board[:, :] = '.'
 
         # map 8×8 chessboard into rows 1–8, cols 2–9
-        for rank in range(8):
-            for file in range(8):
-                # get the square number from the chess board
-                square = chess.square(file, 7 - rank)
-                # get the piece at the square
-                piece = self.chess_board.piece_at(square)
-                # place the piece in our internal representation if the 8x8 board square isn't empty
-                if piece:
-                    self.state_board[rank + 1, file + 2] = piece.symbol()
+        # walk each piece type's bitboard for each color so every square found already knows its symbol,
+        # without building piece objects or looking up types square by square, then place them all with one fancy-indexed write
+        board = self.chess_board
+        squares = []
+        symbols = []
+        for color in chess.COLORS:
+            color_mask = board.occupied_co[color]
+            for piece_type, bb in enumerate((board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings), 1):
+                found = list(chess.scan_forward(bb & color_mask))
+                squares += found
+                symbols += [PIECE_SYMBOLS[color][piece_type]] * len(found)
+        if squares:
+            self.state_board[SQUARE_STATE_ROWS[squares], SQUARE_STATE_COLS[squares]] = symbols
 
         # promotion lanes
-        for i, p in enumerate(self.white_promos):
-            self.state_board[i, 0] = p # place the white promotion options in the left-most column
-        for i, p in enumerate(self.black_promos):
-            self.state_board[i, 11] = p # place the black promotion options in the right-most column
-
-        # add captured pieces
-        # iterate through the captured pieces
-        for i, p in enumerate(self.captured_black):
-            # for each piece, find the corresponding capture space where it should be placed
-            r,c = self.black_captures[i]
-            # place the piece at that square
-            self.state_board[r,c] = p
-        # repeat for white pieces
-        for i, p in enumerate(self.captured_white):
-            r,c = self.white_captures[i]
-            self.state_board[r,c] = p
-
-        # number the empty capture slots
-        # iterate through the pre-allocated capture locations
-        for i, (r,c) in enumerate(self.black_captures):
-            if self.state_board[r,c] == '.': # if a capture space doesn't have a capture
-                self.state_board[r,c] = str(i+1) # display the corresponding index number
+        self.state_board[:, 0] = self.white_promos # place the white promotion options in the left-most column
+        self.state_board[:, 11] = self.black_promos # place the black promotion options in the right-most column
+
+        # number every capture slot with its index, then cover the filled slots with their captured pieces
+        # captured pieces fill the slots in order, so the filled slots are always the first len(captured) of them
+        self.state_board[self._black_cap_rows, self._black_cap_cols] = self._cap_labels
+        if self.captured_black:
+            n = len(self.captured_black)
+            self.state_board[self._black_cap_rows[:n], self._black_cap_cols[:n]] = self.captured_black
         # repeat for white capture locations
-        for i, (r,c) in enumerate(self.white_captures):
-            if self.state_board[r,c] == '.':
-                self.state_board[r,c] = str(i+1)
+        self.state_board[self._white_cap_rows, self._white_cap_cols] = self._cap_labels
+        if self.captured_white:
+            n = len(self.captured_white)
+            self.state_board[self._white_cap_rows[:n], self._white_cap_cols[:n]] = self.captured_white
 
     # set up the node representation by spacing out the state board
     def _populate_node_grid(self):
@@ -194,13 +325,9 @@ class BoardItem:
         """
         # fill in the entire 19x23 array with periods denoting empty spaces
         self.node_grid[:, :] = '.'
-        # iterate through every index from the state board
-        for r in range(self.state_rows):
-            for c in range(self.state_cols):
-                piece = self.state_board[r,c] # get the piece from the state board for the given index
-                node_r = r * 2 # create the new node index by multiplying indices by 2
-                node_c = c * 2
-                self.node_grid[node_r, node_c] = piece # place the piece in the node space
+        # every state board cell (r, c) lands on node (r*2, c*2), so the even rows and columns of the
+        # node grid are exactly the state board and can be copied with one strided assignment
+        self.node_grid[::2, ::2] = self.state_board
 
     # helper function to update the visualizations
     def update_from_chess(self):
@@ -212,6 +339,31 @@ class BoardItem:
         """
         self._populate_state_board()
         self._populate_node_grid()
+        # the board changed, so any parsed move no longer applies
+        self._parsed_move = None
+
+    # parse a move once for both planning and execution
+    def _parse_move(self, uci_move):
+        """
+        parse a uci move and look up the pieces on its start and end squares
+        plan_path and move_piece are called back to back with the same move, so the
+        last result is kept until the board changes
+
+        Args:
+            uci_move (str): 4 or 5 character uci chess move
+
+        Returns:
+            tuple[chess.Move, chess.Piece or None, chess.Piece or None]:
+                the parsed move, the piece on its start square, and the piece on its end square
+        """
+        cached = self._parsed_move
+        if cached is not None and cached[0] == uci_move:
+            return cached[1]
+        # pass the uci to python chess to determine move legality and start/end positions
+        move = self.chess_board.parse_uci(uci_move)
+        parsed = (move, self.chess_board.piece_at(move.from_square), self.chess_board.piece_at(move.to_square))
+        self._parsed_move = (uci_move, parsed)
+        return parsed
 
     # move a piece and update all of the visualizations
     def move_piece(self, uci_move):
@@ -227,17 +379,16 @@ class BoardItem:
         if len(uci_move) == 5:
             promotion = uci_move[-1]
 
-        move = self.chess_board.parse_uci(uci_move)
-        moving_piece = self.chess_board.piece_at(move.from_square)
-        captured_piece = self.chess_board.piece_at(move.to_square)
+        move, moving_piece, captured_piece = self._parse_move(uci_move)
 
         # detect en passant: pawn moves diagonally to empty square
         if moving_piece and moving_piece.piece_type == chess.PAWN:
-            from_rank, from_file = chess.square_rank(move.from_square), chess.square_file(move.from_square)
-            _, to_file = chess.square_rank(move.to_square), chess.square_file(move.to_square)
+            # python-chess numbers squares rank * 8 + file, so rank and file are plain bit ops
+            from_rank, from_file = move.from_square >> 3, move.from_square & 7
+            to_file = move.to_square & 7
             if abs(to_file - from_file) == 1 and captured_piece is None:
                 # captured pawn is on the same file as destination, rank of the starting pawn
-                captured_sq = chess.square(to_file, from_rank)
+                captured_sq = SQUARES[from_rank][to_file]
                 captured_piece = self.chess_board.piece_at(captured_sq)
 
         # update captured pieces
@@ -255,15 +406,14 @@ class BoardItem:
         )
 
         if is_promotion:
-            promo_map = {'Q': chess.QUEEN, 'R': chess.ROOK, 'B': chess.BISHOP, 'N': chess.KNIGHT}
             promo_char = promotion.upper()
             # push the promotion move to python chess
-            self.chess_board.push(chess.Move(move.from_square, move.to_square, promotion=promo_map[promo_char]))
-            promo_list = self.white_promos if moving_piece.color == chess.WHITE else self.black_promos
-            for i,p in enumerate(promo_list):
-                if p.upper() == promo_char:
-                    promo_list[i] = 'P' if moving_piece.color == chess.WHITE else 'p'
-                    break
+            self.chess_board.push(chess.Move(move.from_square, move.to_square, promotion=PROMOTION_PIECE_TYPES[promo_char]))
+            # the pawn takes the place of the first remaining promotion piece of that type in the lane
+            slots = self._promo_slots[moving_piece.color][promo_char]
+            if slots:
+                promo_list = self.white_promos if moving_piece.color == chess.WHITE else self.black_promos
+                promo_list[slots.pop(0)] = 'P' if moving_piece.color == chess.WHITE else 'p'
         else:
             # push a regular move to python chess
             self.chess_board.push(move)
@@ -289,10 +439,11 @@ class BoardItem:
         Returns:
             None
         """
-        print("=== 10×12 State Board ===")
-        for r in range(self.state_rows):
-            # use 2 character wide cells for even display and a space between each cell
-            print(" ".join(f"{str(cell):>2}" for cell in self.state_board[r,:]))
+        # build the whole board as one block of text and print it once
+        # use 2 character wide cells for even display and a space between each cell
+        lines = ["=== 10×12 State Board ==="]
+        lines.extend(" ".join(f"{cell:>2}" for cell in row) for row in self.state_board.tolist())
+        print("\n".join(lines))
 
     def display_nodes(self):
         """
@@ -301,10 +452,177 @@ class BoardItem:
         Returns:
             None
         """
-        print("=== 19×23 Node Grid ===")
-        for r in range(self.node_rows):
-            # use 2 character wide cells for even display and a space between each cell
-            print(" ".join(f"{str(cell):>2}" for cell in self.node_grid[r,:]))
+        # build the whole grid as one block of text and print it once
+        # use 2 character wide cells for even display and a space between each cell
+        lines = ["=== 19×23 Node Grid ==="]
+        lines.extend(" ".join(f"{cell:>2}" for cell in row) for row in self.node_grid.tolist())
+        print("\n".join(lines))
+
+    # a star search on the node grid, reusing recent results
+    def _astar(self, start, goal, passable, blocked_node=None):
+        """
+        find a shortest path between two nodes, answering repeated searches from a small cache
+        a search only depends on its endpoints, the blocked node and the passability, so those form the key
+
+        Args:
+            start (tuple[int, int]): starting node as (row, col)
+            goal (tuple[int, int]): goal node as (row, col)
+            passable (bytearray): flat passability of every node, index (r, c) as r * node_cols + c
+            blocked_node (tuple[int, int] or None): a node to treat as occupied for this search only
+
+        Returns:
+            list[tuple[int, int]] or None:
+                A list of tuple nodes from start to goal if a path
+                exists, otherwise, None
+        """
+        key = (start, goal, blocked_node, bytes(passable))
+        cache = self._path_cache
+        if key in cache:
+            # move the hit to the back so it is the last to be dropped
+            path = cache.pop(key)
+        else:
+            path = self._astar_search(start, goal, passable, blocked_node)
+            # drop the least recently used result once the cache is full
+            if len(cache) >= PATH_CACHE_SIZE:
+                del cache[next(iter(cache))]
+        cache[key] = path
+        # hand back a copy so callers can't change the cached path
+        return None if path is None else list(path)
+
+    # straight run for the a star fast path
+    def _walk_line(self, idx, step_r, step_c, count, open_cells, line):
+        """
+        walk a straight run of nodes in one direction, appending each node reached to line
+
+        Args:
+            idx (int): flat index of the node the run starts from
+            step_r (int): row step of the run, -1, 0 or 1
+            step_c (int): column step of the run, -1, 0 or 1
+            count (int): number of steps to take
+            open_cells (bytearray): flat passability of every node for the current search
+            line (list[tuple[int, int]]): path so far, extended in place
+
+        Returns:
+            int: flat index of the last node reached, or -1 if the run is blocked
+        """
+        node_cols = self.node_cols
+        step = step_r * node_cols + step_c
+        for _ in range(count):
+            nxt = idx + step
+            # diagonal steps also need both orthogonal nodes they squeeze between to be open
+            if not open_cells[nxt] or (step_r and step_c and not (open_cells[idx + step_c] and open_cells[idx + step_r * node_cols])):
+                return -1
+            idx = nxt
+            line.append(divmod(idx, node_cols))
+        return idx
+
+    # a star search on the node grid
+    def _astar_search(self, start, goal, passable, blocked_node=None):
+        """
+        find a shortest path between two nodes using the a star algorithm
+        the node grid is only read, so searches never depend on each other's temporary blocks
+
+        Args:
+            start (tuple[int, int]): starting node as (row, col)
+            goal (tuple[int, int]): goal node as (row, col)
+            passable (bytearray): flat passability of every node, index (r, c) as r * node_cols + c
+            blocked_node (tuple[int, int] or None): a node to treat as occupied for this search only
+
+        Returns:
+            list[tuple[int, int]] or None:
+                A list of tuple nodes from start to goal if a path
+                exists, otherwise, None
+        """
+        # if already at the gaol, no need to search
+        if start == goal:
+            return [start]
+        node_cols = self.node_cols
+        goal_r, goal_c = goal
+        # the search runs on flat node indices so its bookkeeping can live in plain lists instead of dicts and sets
+        start_idx = start[0] * node_cols + start[1]
+        goal_idx = goal_r * node_cols + goal_c
+        # copy the shared passability into the scratch mask so this search can close its blocked node and open its goal
+        open_cells = self._astar_open
+        open_cells[:] = passable
+        if blocked_node is not None:
+            open_cells[blocked_node[0] * node_cols + blocked_node[1]] = 0
+        open_cells[goal_idx] = 1
+        # a shortest path takes min(|row change|, |col change|) diagonal steps and the rest as straight steps
+        # if that route is open with the diagonal run first or last, it is already a shortest path, so return
+        # it without touching the heap, which covers most moves on an uncluttered board
+        d_r, d_c = goal_r - start[0], goal_c - start[1]
+        step_r = (d_r > 0) - (d_r < 0)
+        step_c = (d_c > 0) - (d_c < 0)
+        n_diag = min(abs(d_r), abs(d_c))
+        n_straight = max(abs(d_r), abs(d_c)) - n_diag
+        diag_leg = (step_r, step_c, n_diag)
+        straight_leg = (step_r, 0, n_straight) if abs(d_r) > abs(d_c) else (0, step_c, n_straight)
+        # when the goal is on the same row, column or diagonal there is only one leg, so only one order to try
+        orders = [(diag_leg, straight_leg)]
+        if n_diag and n_straight:
+            orders.append((straight_leg, diag_leg))
+        for legs in orders:
+            idx = start_idx
+            line = [start]
+            for leg_r, leg_c, count in legs:
+                idx = self._walk_line(idx, leg_r, leg_c, count, open_cells, line)
+                if idx < 0:
+                    break
+            else:
+                return line
+        # cheapest known cost to reach each node, the node it was reached from, and whether it has been expanded
+        # parents are only read along nodes reached in this search, so only the cost and expanded tables need resetting
+        best_g = self._astar_best_g
+        best_g[:] = self._astar_unreached
+        came_from = self._astar_came_from
+        closed = self._astar_closed
+        closed[:] = self._astar_zeros
+        best_g[start_idx] = 0
+        came_from[start_idx] = -1
+        neighbor_table = self._neighbor_table
+        # the heuristic is the chebyshev distance to the goal
+        # a diagonal step costs the same as a straight one, so the number of steps needed is the larger of the
+        # row and column distances, which never overestimates and lets each node settle the first time it is expanded
+        # it only depends on the goal, so every node's value is worked out once per goal and looked up on each push
+        h_table = self._heuristic_tables.get(goal_idx)
+        if h_table is None:
+            h_table = np.maximum(np.abs(self._node_row_of - goal_r), np.abs(self._node_col_of - goal_c)).tolist()
+            self._heuristic_tables[goal_idx] = h_table
+        # create a queue of nodes to check
+        # use heapq library to check optimality and pick lowest cost node to explore next
+        # heap entries only hold the node, the path is rebuilt from parent pointers once the goal is reached
+        open_set = [(h_table[start_idx], 0, start_idx)]
+        # while there are still nodes to check
+        while open_set:
+            # check options from current node
+            _, g, idx = heapq.heappop(open_set)
+            # if we already expanded the node, skip it
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+            # if we've made it to the goal, walk the parent pointers back to the start and return the path we took
+            if idx == goal_idx:
+                path = []
+                while idx != -1:
+                    path.append(divmod(idx, node_cols))
+                    idx = came_from[idx]
+                path.reverse()
+                return path
+            # look at all valid neighbors and add them to the heap in order of cost with the lowest cost options first
+            # only push a neighbor when this route to it is cheaper than any found so far
+            new_g = g + 1
+            # check all in-bounds surrounding nodes from the precomputed table, the node must be open, and for
+            # diagonal neighbors so must the 2 orthogonal nodes it squeezes between
+            for nbr, sides in neighbor_table[idx]:
+                if not open_cells[nbr] or closed[nbr] or new_g >= best_g[nbr]:
+                    continue
+                if sides and not (open_cells[sides[0]] and open_cells[sides[1]]):
+                    continue
+                best_g[nbr] = new_g
+                came_from[nbr] = idx
+                heapq.heappush(open_set, (new_g + h_table[nbr], new_g, nbr))
+        # if no path available, don't return anything
+        return None
 
     # a star path planning
     def plan_path(self, uci_move):
@@ -333,157 +651,84 @@ class BoardItem:
                 each list contains node-grid coordinates representing the path 
                 with the string corresponding to the type of move occuring
         """
+        # the plan only depends on the move and the physical layout, and the state board holds the whole layout
+        key = (uci_move, self.state_board.tobytes())
+        cache = BoardItem._plan_cache
+        with BoardItem._plan_cache_lock:
+            path_seq = cache.pop(key, None)
+        if path_seq is None:
+            path_seq = self._plan_path(uci_move)
+        with BoardItem._plan_cache_lock:
+            # drop the least recently used plan once the cache is full
+            if key not in cache and len(cache) >= PLAN_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            # a hit goes to the back so it is the last to be dropped
+            cache[key] = path_seq
+        # hand back copies so callers can't change the cached paths
+        return [(step_type, None if path is None else list(path)) for step_type, path in path_seq]
+
+    def _plan_path(self, uci_move):
+        """
+        plan the labeled steps for a chess move without consulting the plan cache
+
+        Args:
+            uci_move (str): 4 or 5 character uci chess move
+
+        Returns:
+            list[tuple[str, list[tuple[int, int]]]]: the labeled steps, as described in plan_path
+        """
         promotion = None
         if len(uci_move) == 5:
             promotion = uci_move[-1]
 
-        # pass the uci to python chess to determine move legality and start/end positions
-        move = self.chess_board.parse_uci(uci_move)
+        # parse the move and get the piece we're planning for and the piece on the end square from python chess
+        move, piece, end_piece = self._parse_move(uci_move)
         start_sq = move.from_square
         end_sq = move.to_square
 
-        # determine board row/column for start and end positions
-        sr = chess.square_rank(start_sq)
-        sc = chess.square_file(start_sq)
-        er = chess.square_rank(end_sq)
-        ec = chess.square_file(end_sq)
+        # determine board row/column for start and end positions (squares are rank * 8 + file)
+        sr = start_sq >> 3
+        sc = start_sq & 7
+        er = end_sq >> 3
+        ec = end_sq & 7
 
-        # determine node row/column for start and end positions based on board indices
-        start_node = ((8 - sr) * 2, (sc + 2) * 2)
-        end_node   = ((8 - er) * 2, (ec + 2) * 2)
+        # look up the node row/column for start and end positions
+        start_node = SQUARE_NODES[start_sq]
+        end_node   = SQUARE_NODES[end_sq]
 
         # create a placeholder for the path list
         path_seq = []
 
-        # helper functions for pathfinding
-        def neighbors(r, c, goal):
-            """
-            determine the neighboring nodes to a given nodes that are valid to move to
-            
-            Args:
-                r (int): the row index of the current node
-                c (int): the column index of the current node
-                goal (tuple[int,int]): the indices of the goal node
-
-            Returns:
-                list[tuple[int,int]]: a list of the valid neighboring nodes to move to
-            """
-            # create placeholder list for valid node moves
-            valid = []
-            # check all 8 surrounding nodes to the current node
-            for dr, dc in [(-1,0),(1,0),(0,-1),(0,1),(-1,-1),(-1,1),(1,-1),(1,1)]:
-                # check one neighbor at a time
-                nr, nc = r + dr, c + dc
-                # ensure we are within the board range
-                if 0 <= nr < self.node_rows and 0 <= nc < self.node_cols:
-                    # get the status of the node from internal tracking
-                    cell = self.node_grid[nr, nc]
-                    # if the node is empty, an empty capture space, or the goal space, it is a valid move
-                    if cell == '.' or (isinstance(cell, str) and cell.isdigit()) or (nr,nc) == goal:
-                        # extra conditions for diagonal neighbors
-                        if abs(dr) == 1 and abs(dc) == 1:
-                            blocked = False
-                            for sr2 in [r, nr]:
-                                for sc2 in [c, nc]:
-                                    # check the 2 orthogonal neighbors and if either contains a piece then that diagonal neighbor is not allowed
-                                    if (sr2, sc2) != (r, c) and self.node_grid[sr2, sc2] not in ('.', str(sr2*sc2), self.node_grid[nr,nc]):
-                                        blocked = True
-                            # skip to the next loop if it's blocked
-                            if blocked:
-                                continue
-                        # if the neighbor passes all checks, add it to the valid list
-                        valid.append((nr, nc))
-            return valid
-
-        def man_dist(a, b):
-            """
-            compute the manhattan distance between two grid coordinates
-            manhattan distance goes along the edges of the triangle rather than the hypoteneuse
-
-            Args:
-                a (tuple[int, int]): first coordinate as (row, col)
-                b (tuple[int, int]): second coordinate as (row, col)
-
-            Returns:
-                int: manhattan distance between a and b
-            """
-            return abs(a[0]-b[0]) + abs(a[1]-b[1])
-
-        def astar(start, goal):
-            """
-            find a shortest path between two nodes using the a star algorithm
-
-            Args:
-                start (tuple[int, int]): starting node as (row, col)
-                goal (tuple[int, int]): goal node as (row, col)
-
-            Returns:
-                list[tuple[int, int]] or None:
-                    A list of tuple nodes from start to goal if a path
-                    exists, otherwise, None
-            """
-            # if already at the gaol, no need to search
-            if start == goal:
-                return [start]
-            # create a queue of nodes to check
-            open_set = []
-            # use heapq library to check optimality and pick lowest cost node to explore next
-            heapq.heappush(open_set, (man_dist(start, goal), 0, start, [start]))
-            # add any already visited nodes to a set to avoid going through them again
-            visited = set()
-            # while there are still nodes to check
-            while open_set:
-                # check options from current node
-                _, g, current, path = heapq.heappop(open_set)
-                # if we already visited the node, skip it
-                if current in visited:
-                    continue
-                # add the node we're on to the visited nodes
-                visited.add(current)
-                # if we've made it to the goal, return the path we took
-                if current == goal:
-                    return path
-                # if we're still going, get the node row and column
-                r, c = current
-                # look at all valid neighbors and add them to the heap in order of cost with the lowest cost options first
-                for nbr in neighbors(r, c, goal):
-                    if nbr not in visited:
-                        heapq.heappush(open_set, (g + 1 + man_dist(nbr, goal), g + 1, nbr, path + [nbr]))
-            # if no path available, don't return anything
-            return None
-
-        # get the piece we're planning for from python chess
-        piece = self.chess_board.piece_at(start_sq)
+        # flat passability of the node grid for pathfinding, index (r, c) as r * node_cols + c
+        # a node can be travelled through if it is empty or an empty capture space, and since that never
+        # changes during planning it is worked out once here instead of testing strings on every expansion
+        # plain bytearray lookups are much cheaper than reading single numpy cells
+        # each '<U2' cell is 2 little-endian uint32 code points, so the first code point of every cell is read as an integer
+        # and mapped through the code table in one take instead of comparing strings
+        passable = bytearray(PASSABLE_CODES.take(self.node_grid.view('<u4')[:, ::2]).tobytes())
 
         # handle castling
         # if a king is moving more than one square
         if piece and piece.piece_type == chess.KING and abs(ec - sc) > 1:
             # plan the king move
-            king_path = astar(start_node, end_node)
+            king_path = self._astar(start_node, end_node, passable)
             path_seq.append(('castle_king', king_path))
-            # determine which rook should move and where it should move to
+            # determine which rook file should move and which file it should move to
+            # the rook stays on the king's rank, so only the files are needed
             if ec > sc:
-                rook_start_sq = chess.square(7, sr)
-                rook_end_sq   = chess.square(ec-1, sr)
+                rsf, ref = 7, ec - 1
             else:
-                rook_start_sq = chess.square(0, sr)
-                rook_end_sq   = chess.square(ec+1, sr)
-            # grab the rows too
-            rsf = chess.square_file(rook_start_sq)
-            ref = chess.square_file(rook_end_sq)
+                rsf, ref = 0, ec + 1
             # convert to nodes
-            rook_start_node = ((8-sr)*2, (rsf+2)*2)
-            rook_end_node   = ((8-sr)*2, (ref+2)*2)
-            # temporarily block the king's end space while the rook moves until the move is over
-            saved = self.node_grid[end_node[0], end_node[1]]
-            self.node_grid[end_node[0], end_node[1]] = '#'
-            path_seq.append(('castle_rook', astar(rook_start_node, rook_end_node)))
-            self.node_grid[end_node[0], end_node[1]] = saved
+            rook_start_node = SQUARE_NODES[SQUARES[sr][rsf]]
+            rook_end_node   = SQUARE_NODES[SQUARES[sr][ref]]
+            # block the king's end space while the rook moves since the king is already there
+            path_seq.append(('castle_rook', self._astar(rook_start_node, rook_end_node, passable, blocked_node=end_node)))
 
         # handle captures
         else:
             # check if a piece is being captured
-            captured_piece = self.chess_board.piece_at(end_sq)
+            captured_piece = end_piece
             # check for en passant capture
             is_en_passant = False
             # must be a pawn
@@ -491,42 +736,28 @@ class BoardItem:
                 if abs(ec - sc) == 1 and captured_piece is None:
                     # pawn moved diagonally but destination empty means en passant
                     is_en_passant = True
-                    captured_sq = chess.square(ec, sr) # pawn captured is on the same rank as start and the ending column for the capturing pawn
+                    captured_sq = SQUARES[sr][ec] # pawn captured is on the same rank as start and the ending column for the capturing pawn
                     captured_piece = self.chess_board.piece_at(captured_sq) # get the actual pawn from python chess
 
             # if regular capture, move the captured piece to the next available capture space
             if captured_piece:
+                # captured pieces fill their color's slots in order, so the next open slot is the number captured so far
                 if captured_piece.color == chess.WHITE:
-                    caps = self.white_captures
+                    r, c = self.white_captures[len(self.captured_white)]
                 else:
-                    caps = self.black_captures
+                    r, c = self.black_captures[len(self.captured_black)]
+                cap_node = (r*2, c*2)
                 if is_en_passant:
-                    # determine node coordinates of the captured pawn's actual position
-                    captured_sq = chess.square(ec, sr)  # captured pawn is on same rank as start
-                    captured_node = ((8 - sr) * 2, (ec + 2) * 2)  # node grid coordinates
-
-                    # find next empty capture slot for captured pawn
-                    caps = self.white_captures if captured_piece.color == chess.WHITE else self.black_captures
-                    capture_slot_node = None
-                    for idx, (r, c) in enumerate(caps):
-                        if self.state_board[r, c] == str(idx + 1):
-                            capture_slot_node = (r * 2, c * 2)
-                            break
-
+                    # determine node coordinates of the captured pawn's actual position (same rank as start)
+                    captured_node = SQUARE_NODES[captured_sq]  # node grid coordinates
                     # add the captured pawn movement path from its current square to the capture slot
-                    if captured_node and capture_slot_node:
-                        path_seq.append(('capture', astar(captured_node, capture_slot_node)))
+                    path_seq.append(('capture', self._astar(captured_node, cap_node, passable)))
 
                 # determine regular capture path to next open capture space
                 else:
-                    # find next open capture node
-                    for i,(r,c) in enumerate(caps):
-                        if self.state_board[r,c] == str(i+1):
-                            cap_node = (r*2, c*2)
-                            # plan the capture piece to the capture space
-                            cap_path = astar(end_node, cap_node)
-                            path_seq.append(('capture', cap_path))
-                            break
+                    # plan the capture piece to the capture space
+                    cap_path = self._astar(end_node, cap_node, passable)
+                    path_seq.append(('capture', cap_path))
 
             # promotion handling
             is_promo = promotion and piece and piece.piece_type == chess.PAWN
@@ -534,28 +765,22 @@ class BoardItem:
             if is_promo:
                 # get the column based on the player color
                 promo_col = 0 if piece.color == chess.WHITE else 11
-                promo_node = None
-                # check for the promotion piece needed in the column to get the row
-                for r in range(self.state_rows):
-                    if self.state_board[r,promo_col].upper() == promotion.upper():
-                        promo_node = (r*2, promo_col*2)
-                        break
+                # the first lane row still holding the promotion piece needed, tracked by move_piece
+                slots = self._promo_slots[piece.color].get(promotion.upper())
+                promo_row = slots[0] if slots else None
+                promo_node = None if promo_row is None else (promo_row*2, promo_col*2)
                 # get the column for the pawn's intermediate position
                 side_col = 1 if promo_col == 0 else (self.node_cols - 2)
                 # then determine the node for the pawn to stop at and move it to that node
                 side_node = (promo_node[0], side_col)
-                path_seq.append(('promotion_pawn', astar(start_node, side_node)))
-                # temporarily block the pawn's intermediate position
-                saved = self.node_grid[side_node[0], side_node[1]]
-                self.node_grid[side_node[0], side_node[1]] = '#'
-                # move the promotion piece to the correct square
-                path_seq.append(('promotion_piece', astar(promo_node, end_node)))
-                self.node_grid[side_node[0], side_node[1]] = saved
+                path_seq.append(('promotion_pawn', self._astar(start_node, side_node, passable)))
+                # move the promotion piece to the correct square, blocking the pawn's intermediate position
+                path_seq.append(('promotion_piece', self._astar(promo_node, end_node, passable, blocked_node=side_node)))
                 # move the pawn over 1 node to it's end position
                 path_seq.append(('promotion_pawn_final', [side_node, promo_node]))
             else:
                 # regular move path planning
-                path_seq.append(('move', astar(start_node, end_node)))
+                path_seq.append(('move', self._astar(start_node, end_node, passable)))
 
         return path_seq
 
@@ -577,45 +802,43 @@ class BoardItem:
         Returns:
             None
         """
-        # make a copy of the node grid to add marks to
-        vis = np.array(self.node_grid, copy=True, dtype=object)
+        # copy the node grid into the reusable buffer to add marks to
+        # the markers are single characters, so the buffer keeps the grid's fixed-width dtype instead of boxing every cell
+        vis = self._vis_buf
+        np.copyto(vis, self.node_grid)
         for step_type, path in path_seq:
             # skip any non-path instructions
             if not path: continue
-            # get the correct marker for the type of move
-            marker = {
-                'move':'M','capture':'C','promotion_pawn':'P',
-                'promotion_piece':'X','promotion_pawn_final':'P',
-                'castle_king':'K','castle_rook':'R'
-            }.get(step_type,'?')
-            # place the marker at each node along the path
-            for r,c in path:
-                vis[r,c] = marker
-        # display the visualization with markers
-        print("=== Node Grid with Planned Paths ===")
-        for r in range(self.node_rows):
-            print(" ".join(f"{str(cell):>2}" for cell in vis[r,:]))
+            # place the correct marker for the type of move at every node along the path with one fancy-indexed write
+            rows, cols = zip(*path)
+            vis[rows, cols] = PATH_MARKERS.get(step_type, '?')
+        # display the visualization with markers, built as one block of text and printed once
+        # use 2 character wide cells for even display and a space between each cell
+        lines = ["=== Node Grid with Planned Paths ==="]
+        lines.extend(" ".join(f"{cell:>2}" for cell in row) for row in vis.tolist())
+        print("\n".join(lines))
 
     # make g code always available using static method
     @staticmethod
-    def generate_gcode(path_seq, node_spacing=1.0):
+    def generate_gcode_lines(path_seq, node_spacing=1.0):
         """
-        convert a planned path sequence into gcode instructions
+        convert a planned path sequence into gcode instructions, one line at a time
 
         - move to start of each segment with G0 rapid move
         - raise servo
         - follow path using linear moves including diagonals
         - lower servo
 
+        lines are produced as they are needed, so they can be streamed to grbl without
+        building and splitting the whole program first
+
         Args:
             path_seq (list): path sequence from plan path function
             node_spacing (float): scale factor converting grid units to real units if that should change on the real board
 
-        Returns:
-            str: a multi-line gcode program
+        Yields:
+            str: the next line of gcode, or a servo_up/servo_down command
         """
-        # storage for gcode instructions
-        lines = []
         # get each node in the path
         for _, path in path_seq:
             # if it isn't a node, move on
@@ -624,20 +847,40 @@ class BoardItem:
             sr, sc = path[0]
             # get the physical gantry location using known physical spacing
             x0, y0 = sr*node_spacing, sc*node_spacing
-            # rapid move to the position
-            lines.append(f"G0 X{x0:.3f} Y{y0:.3f}")
-            # add a servo up command to magnetize the piece
-            lines.append("servo_up")
-            # iterate along the path sequence until the sequence is up
-            for r,c in path:
-                # convert into physical gantry locations with known physical spacing
-                x, y = r*node_spacing, c*node_spacing
-                # move at slower specified feedrate using G1 move
-                lines.append(f"G1 X{x:.3f} Y{y:.3f} F150")
+            # rapid move to the position, then add a servo up command to magnetize the piece
+            yield "G0 X%.3f Y%.3f" % (x0, y0)
+            yield "servo_up"
+            # iterate along the rest of the path sequence until the sequence is up, converting into physical gantry
+            # locations with known physical spacing and moving at slower specified feedrate using G1 moves
+            # the gantry is already at the first node after the rapid move, so it doesn't get its own G1
+            # runs of nodes in the same direction are merged into one G1 to the last node of the run, so grbl
+            # plans one smooth move instead of slowing down at every node along a straight line
+            for i in range(1, len(path)):
+                r, c = path[i]
+                if i + 1 < len(path):
+                    pr, pc = path[i - 1]
+                    nr, nc = path[i + 1]
+                    # skip nodes where the direction into the node matches the direction out of it
+                    if (r - pr, c - pc) == (nr - r, nc - c):
+                        continue
+                yield "G1 X%.3f Y%.3f F150" % (r*node_spacing, c*node_spacing)
             # lower the servo once the sequence is done
-            lines.append("servo_down")
+            yield "servo_down"
+
+    @staticmethod
+    def generate_gcode(path_seq, node_spacing=1.0):
+        """
+        convert a planned path sequence into a complete gcode program
+
+        Args:
+            path_seq (list): path sequence from plan path function
+            node_spacing (float): scale factor converting grid units to real units if that should change on the real board
+
+        Returns:
+            str: a multi-line gcode program
+        """
         # combine all of the commands into a single string
-        return "\n".join(lines)
+        return "\n".join(BoardItem.generate_gcode_lines(path_seq, node_spacing))
     
     # board reset helper function
     def _direct_path(self, start_node, end_node):
@@ -655,25 +898,37 @@ class BoardItem:
         # trivial case
         if start_node == end_node:
             return [start_node]
-        # track visited and upcoming nodes
-        visited = set()
-        queue = deque([(start_node, [start_node])])
+        # search on flat node indices, index (r, c) as r * node_cols + c
+        node_cols = self.node_cols
+        start_idx = start_node[0]*node_cols + start_node[1]
+        end_idx = end_node[0]*node_cols + end_node[1]
+        # allow moving through empty nodes only, read once per search instead of one numpy cell per neighbor
+        open_cells = bytearray((self.node_grid == '.').ravel().tobytes())
+        open_cells[end_idx] = 1
+        # track the node each visited node was reached from instead of copying the path into every queue entry
+        parents = [-1] * len(open_cells)
+        seen = bytearray(len(open_cells))
+        seen[start_idx] = 1
+        # the queue only ever grows, so a plain list with a read cursor works as the fifo
+        queue = [start_idx]
+        head = 0
         # while there are still valid options to analyze
-        while queue:
-            current, path = queue.popleft()
-            # return if we're at the goal
-            if current == end_node:
-                return path
-            # check neighbors
-            r, c = current
-            for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.node_rows and 0 <= nc < self.node_cols:
-                    if (nr, nc) not in visited:
-                        # allow moving through empty squares only
-                        if self.node_grid[nr, nc] == '.' or (nr, nc) == end_node:
-                            visited.add((nr, nc))
-                            queue.append(((nr, nc), path + [(nr, nc)]))
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            # once we're at the goal, walk the parents back to the start to build the path
+            if current == end_idx:
+                path = []
+                while current != -1:
+                    path.append(divmod(current, node_cols))
+                    current = parents[current]
+                return path[::-1]
+            # check the precomputed in-bounds neighbors
+            for nbr in self._orth_neighbors[current]:
+                if open_cells[nbr] and not seen[nbr]:
+                    seen[nbr] = 1
+                    parents[nbr] = current
+                    queue.append(nbr)
         return [] # if no path found
     
     def reset_board_physical(self):
@@ -683,32 +938,23 @@ class BoardItem:
         Returns:
             None
         """
-        # create a copy of the checkmate layout to reference
-        temp_board = self.state_board.copy()
-        # placeholder for paths
+        # work on the checkmate layout through the piece nodes of the node grid
+        # the even nodes mirror the state board, so this strided view updates both representations with one write
+        temp_board = self.node_grid[::2, ::2]
+        # placeholder for paths, labeled like a plan path sequence so they can go straight to the gcode generator
         reset_paths = []
         # placeholder for squares to not change
         locked_squares = set()
 
-        # define all starting squares for each type of piece to know where each should reset
-        starting_positions = {
-            'R': [(8,2), (8,9), (2,0), (9,0)],
-            'N': [(8,3), (8,8), (1,0), (8,0)],
-            'B': [(8,4), (8,7), (0,0), (7,0)],
-            'Q': [(8,5), (3,0), (4,0), (5,0), (6,0)],
-            'K': [(8,6)],
-            'P': [(7,c) for c in range(2,10)],
-
-            'r': [(1,2), (1,9), (2,11), (9,11)],
-            'n': [(1,3), (1,8), (1,11), (8,11)],
-            'b': [(1,4), (1,7), (0,11), (7,11)],
-            'q': [(1,5), (3,11), (4,11), (5,11), (6,11)],
-            'k': [(1,6)],
-            'p': [(2,c) for c in range(2,10)],
-        }
-
-        # make a set version of starting_positions to reference for all of the starting positions without the piece names
-        all_starting = {sq for v in starting_positions.values() for sq in v}
+        # the starting squares and their board layout never change, so they are built once at import
+        starting_positions = STARTING_POSITIONS
+        start_layout = START_LAYOUT
+
+        # keep the free candidate squares in a list for uniform random picks, along with each square's list position
+        # so squares can be swap-removed and added back in constant time as pieces move in and out
+        # one board compare against the candidate mask finds them all, in board order
+        free_squares = [divmod(i, self.state_cols) for i in np.flatnonzero((temp_board == '.') & RESET_CANDIDATE_MASK).tolist()]
+        free_index = {sq: i for i, sq in enumerate(free_squares)}
 
         def random_free_square():
             """
@@ -719,59 +965,103 @@ class BoardItem:
             Returns:
                 tuple[int, int] or None: a randomly chosen free square as (row, col) or None if no free squares are available
             """
-            # check all board squares and remove all invalid ones
-            free = [
-                (r, c)
-                for r in range(self.state_rows)
-                for c in range(self.state_cols)
-                if temp_board[r, c] == '.'
-                and (r, c) not in locked_squares
-                and (r, c) not in all_starting
-                and c not in (0, 11)
-            ]
             # return a random free square from the list if there are any
-            return random.choice(free) if free else None
+            return random.choice(free_squares) if free_squares else None
+
+        def take_free(sq):
+            """
+            remove a square from the free list once a piece lands on it
+
+            Args:
+                sq (tuple[int, int]): the state board square being filled
+
+            Returns:
+                None
+            """
+            i = free_index.pop(sq, None)
+            if i is None:
+                return
+            # move the last free square into the hole instead of shifting the whole list
+            last = free_squares.pop()
+            if i < len(free_squares):
+                free_squares[i] = last
+                free_index[last] = i
+
+        def release_free(sq):
+            """
+            add a square back to the free list once a piece leaves it, if displaced pieces may use it
+
+            Args:
+                sq (tuple[int, int]): the state board square being emptied
+
+            Returns:
+                None
+            """
+            if sq in RESET_CANDIDATE_SET and sq not in free_index:
+                free_index[sq] = len(free_squares)
+                free_squares.append(sq)
+
+        # index the locations of every piece type in a single pass over the temp board
+        # the index is updated alongside every temp board write so the board never has to be rescanned
+        # one vectorized compare finds every occupied square, then only those are visited in python
+        piece_positions = {}
+        occupied_rows, occupied_cols = np.nonzero(temp_board != '.')
+        occupants = temp_board[occupied_rows, occupied_cols].tolist()
+        for occupant, pos in zip(occupants, zip(occupied_rows.tolist(), occupied_cols.tolist())):
+            piece_positions.setdefault(occupant, []).append(pos)
+
+        def relocate(piece, src, dst):
+            """
+            plan a direct path for one piece and apply the move to all of the reset tracking
+
+            Args:
+                piece (str): the symbol of the piece being moved
+                src (tuple[int, int]): the state board square the piece is leaving
+                dst (tuple[int, int]): the state board square the piece is moving to
+
+            Returns:
+                None
+            """
+            # convert the squares to node notation
+            start_node = (src[0]*2, src[1]*2)
+            end_node   = (dst[0]*2, dst[1]*2)
+            # find the path between the nodes and add it to the overall list of moves
+            reset_paths.append(("move", self._direct_path(start_node, end_node)))
+            # the piece's index entry follows it to the new square
+            locs = piece_positions[piece]
+            locs[locs.index(src)] = dst
+            # the new square now contains the piece and the previous space is now empty
+            # temp_board is a view of the node grid, so the node grid follows along
+            temp_board[dst] = piece
+            temp_board[src] = '.'
+            # keep the free list in step with the board
+            take_free(dst)
+            release_free(src)
 
         # lock all of the squares that are already correct
-        for piece, valid_sqs in starting_positions.items():
-            # using numpy, get the location of all of the current piece type by checking where it matches in the temp board
-            for pos in zip(*np.where(temp_board == piece)):
-                # if piece position is in the valid square list, lock that square 
-                if pos in valid_sqs:
-                    locked_squares.add(pos)
+        # a starting square is correct when it holds the piece the layout expects there, found with one board compare
+        correct_rows, correct_cols = np.nonzero((temp_board == start_layout) & (start_layout != '.'))
+        locked_squares.update(zip(correct_rows.tolist(), correct_cols.tolist()))
 
         # randomly move all of the pieces that are in the incorrect starting position spaces
-        for piece, valid_sqs in starting_positions.items():
-            # figure out which piece is in each starting square
-            for sq in valid_sqs:
-                occupant = temp_board[sq]
-                # if the wrong piece is in the square, move it to a random free square
-                if occupant != '.' and occupant != piece:
-                    free_sq = random_free_square()
-                    # skip failed searches to avoid errors
-                    if free_sq is None:
-                        continue  # should never happen but avoid errors, human can fix lol
-
-                    # convert the squares to node notation
-                    start_node = (sq[0]*2, sq[1]*2)
-                    end_node   = (free_sq[0]*2, free_sq[1]*2)
-
-                    # add the random move to the list of reset paths
-                    reset_paths.append(self._direct_path(start_node, end_node))
-
-                    # update internal tracking
-                    # random square is now occupied by the piece that was moved
-                    temp_board[free_sq] = occupant
-                    self.node_grid[end_node[0], end_node[1]] = occupant
-                    # the starting space has opened up
-                    temp_board[sq] = '.'
-                    self.node_grid[start_node[0], start_node[1]] = '.'
+        # diff the board against the layout once to find every starting square holding the wrong piece
+        # moving a piece to a free square never changes another starting square, so the diff stays valid
+        wrong_rows, wrong_cols = np.nonzero((start_layout != '.') & (temp_board != '.') & (temp_board != start_layout))
+        for sq in zip(wrong_rows.tolist(), wrong_cols.tolist()):
+            # move the wrong piece to a random free square
+            free_sq = random_free_square()
+            # skip failed searches to avoid errors
+            if free_sq is None:
+                continue  # should never happen but avoid errors, human can fix lol
+
+            # move the piece out of the way, which opens up the starting space
+            relocate(str(temp_board[sq]), sq, free_sq)
 
         # put correct pieces into starting spaces after all incorrect starting spaces have been opened up
         for piece, valid_sqs in starting_positions.items():
-            # like before, get locations for all pieces of a certain type by referencing the temp board
+            # like before, get locations for all pieces of a certain type from the index in board order
             current_positions = []
-            for pos in zip(*np.where(temp_board == piece)):
+            for pos in sorted(piece_positions.get(piece, [])):
                 # avoid moving locked squares
                 if pos not in locked_squares:
                     # make a list of pieces to move
@@ -781,27 +1071,21 @@ class BoardItem:
             for sq in valid_sqs:
                 if temp_board[sq] == '.':
                     target_sqs.append(sq)
-            # iterate through the pieces to move to the correct starting positions
-            for piece_pos, target in zip(current_positions, target_sqs):
-                # move the piece from its current incorrect position
-                start_node = (piece_pos[0]*2, piece_pos[1]*2)
-                # to the correct game start square
-                end_node   = (target[0]*2, target[1]*2)
-                # find the path between the nodes and add it to the overall list of moves
-                reset_paths.append(self._direct_path(start_node, end_node))
-
-                # update internal tracking
-                # the correct starting square now contains the correct piece
-                temp_board[target] = piece
-                self.node_grid[end_node[0], end_node[1]] = piece
-                # the previous space is now empty
-                temp_board[piece_pos] = '.'
-                self.node_grid[start_node[0], start_node[1]] = '.'
+            # fill the starting squares in layout order, so board squares are filled before promotion lanes,
+            # sending the closest remaining piece to each one to keep the gantry's travel short
+            for target in target_sqs:
+                if not current_positions:
+                    break
+                tr, tc = target
+                piece_pos = min(current_positions, key=lambda pos: abs(pos[0] - tr) + abs(pos[1] - tc))
+                current_positions.remove(piece_pos)
+                # move the piece from its current incorrect position to the correct game start square
+                relocate(piece, piece_pos, target)
                 # lock the square now that its correct to avoid moving it again
                 locked_squares.add(target)
 
         # make the gcode to send to the arduino
-        gcode = self.generate_gcode([("move", path) for path in reset_paths])
+        gcode = self.generate_gcode(reset_paths)
         return gcode
     
     def filter_number_tokens(self, tokens):
@@ -933,7 +1217,7 @@ class PremadeGameMode:
     FOR DEMOS
 
     Methods:
-        play_next_move(send_gcode_line):
+        play_next_move(stream_gcode):
             communicate moves to the arduino
     """
     def __init__(self, board_item, arduino, pi, show_paths=True):
@@ -987,12 +1271,33 @@ class PremadeGameMode:
         ]
         self.index = 0
 
-    def play_next_move(self, send_gcode_line):
+        # the move list is fixed, so every path can be planned ahead on a copy of the board in the background
+        # while the demo is being set up, and play_next_move only has to send gcode
+        # a plan is None until the planner gets to it, in which case the move is planned live instead
+        self._planned = [None] * len(self.moves)
+        self._planner = threading.Thread(target=self._precompute_paths, args=(copy.deepcopy(board_item),), daemon=True)
+        self._planner.start()
+
+    def _precompute_paths(self, shadow):
+        """
+        plan every premade move ahead of time on a private copy of the board
+
+        Args:
+            shadow (BoardItem): a copy of the board as it was when the game mode was created
+
+        Returns:
+            None
+        """
+        for i, uci_move in enumerate(self.moves):
+            self._planned[i] = shadow.plan_path(uci_move)
+            shadow.move_piece(uci_move)
+
+    def play_next_move(self, stream_gcode):
         """
         execute the next move in the predefined move list
 
         Args:
-            send_gcode_line (callable): function used to send a single line of gcode to the gantry controller
+            stream_gcode (callable): function used to stream a list of gcode lines to the gantry controller
 
         Returns:
             bool: True if a move was executed successfully or False if no moves remain and the game is over
@@ -1003,18 +1308,15 @@ class PremadeGameMode:
         # get the current move
         uci_move = self.moves[self.index]
 
-        # plan the move path
-        move_path = self.board.plan_path(uci_move)
+        # use the path planned in the background, or plan it now if the planner hasn't reached this move yet
+        move_path = self._planned[self.index]
+        if move_path is None:
+            move_path = self.board.plan_path(uci_move)
         # display the path if desired
         if self.show_paths:
             self.board.display_paths(move_path)
-        # make the gcode
-        gcode_str = BoardItem.generate_gcode(move_path)
-        # send the lines to the arduino one at a time
-        lines = gcode_str.splitlines()
-        for i, line in enumerate(lines):
-            next_line = lines[i + 1] if i + 1 < len(lines) else None
-            send_gcode_line(line, self.arduino, self.pi, next_line)
+        # make the gcode and stream the lines to the arduino as they are generated
+        stream_gcode(BoardItem.generate_gcode_lines(move_path), self.arduino, self.pi)
 
         # update internal board and tracking
         self.board.move_piece(uci_move)
@@ -4,9 +4,13 @@ Full game control for physical gantry chess board.
 
 import chess
 import chess.engine
+import chess.polyglot
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import select
 import serial
+from collections import deque
 import pigpio
 from subprocess import Popen, PIPE
 from board_item import BoardItem, PremadeGameMode
@@ -15,18 +19,31 @@ from vosk import Model
 # GENERAL CONFIGURATION
 STOCKFISH_PATH = "/home/chess/stockfish/stockfish-android-armv8" # path to stockfish engine, for pi: /home/chess/stockfish/stockfish-android-armv8
 MODEL_PATH = "/home/chess/vosk-model-small-en-us-0.15"
+BOOK_PATH = "/home/chess/books/performance.bin" # polyglot opening book, stockfish plays every move if it's missing
 ENGINE_TIME = 1 # amount of time stockfish has to make a decision
 TURN_DELAY = 0 # added delay to prevent runaway memory if desired
 SHOW_PATHS = True # display planned paths if True
+ENGINE_THREADS = 4 # search threads per stockfish process, the pi has 4 cores
+ENGINE_HASH = 256 # stockfish transposition table size in MB, one engine plays both colors so it gets the whole budget
 
 SERVO_PIN = 17  # gpio pin for the servo
 WHITE_LED_PIN = 27 # gpio pin for white turn led
 BLACK_LED_PIN = 22 # gpio pin for black turn led
 SERIAL_PORT = "/dev/ttyACM0" # port for serial cable to arduino
 BAUD_RATE = 115200 # GRBL communication rate (MUST BE 115200)
+GRBL_RX_BUFFER = 128 # size of GRBL's serial receive buffer in bytes
+GRBL_WRITE_CHUNK = 64 # most bytes of gcode packed into a single serial write
+IDLE_POLL_MIN = 0.005 # first delay between GRBL status requests in seconds
+IDLE_POLL_MAX = 0.02 # longest delay between GRBL status requests in seconds
 
 speech_model = Model(MODEL_PATH)
 
+# opening book for computer moves, None if the book file isn't available
+try:
+    opening_book = chess.polyglot.open_reader(BOOK_PATH)
+except OSError:
+    opening_book = None
+
 class LEDBlinker:
     def __init__(self, pi, pin, interval=0.5):
         self.pi = pi
@@ -225,71 +242,197 @@ def wait_until_idle(arduino, timeout=120.0):
         TimeoutError: if grbl does not become idle within "timeout" seconds
     """
     start_time = time.time() # when the function is called, start a timer
+    delay = IDLE_POLL_MIN # poll quickly at first, the gantry is often already done
+    received = b"" # bytes of a status report that hasn't been completed yet
+    arduino.reset_input_buffer()
     while True:
-        arduino.reset_input_buffer()
-        arduino.write(b"?\n") # request grbl status
-        time.sleep(0.1) # wait a moment for a resonse
-
-        while arduino.in_waiting:
-            status = arduino.readline().decode().strip() # get the response
-            if "Idle" in status: # if the gantry is idle, we can move on
-                return
-        # if gantry is not idle, keep looping, but make sure we don't
+        arduino.write(b"?") # request grbl status, '?' is a real-time command so no newline is needed
+        next_poll = time.time() + delay
+
+        # wait for the response until the next request is due, waking up as soon as bytes arrive
+        # instead of sleeping through the whole delay
+        while True:
+            remaining = next_poll - time.time()
+            if remaining <= 0:
+                break
+            select.select([arduino.fileno()], [], [], remaining)
+            # read everything that arrived in one go and check each complete status report,
+            # keeping a partial report for the next read
+            *reports, received = (received + arduino.read(arduino.in_waiting)).split(b"\n")
+            for report in reports:
+                if report.strip().startswith(b"<Idle"): # if the gantry is idle, we can move on
+                    return
+        # if gantry is not idle, back off and keep looping, but make sure we don't
         # exceed the waiting time
+        delay = min(delay * 2, IDLE_POLL_MAX)
         if time.time() - start_time > timeout:
             raise TimeoutError("GRBL did not become idle in time")
 
-def send_gcode_line(line, arduino, pi, next_line=None):
+class GrblStreamer:
     """
-    send a single line of gcode from the pi to the arduino
-    if the next line is a servo command, wait for the gantry to become idle before moving on
+    sender for grbl's character counting protocol
+    keeps track of how many bytes are sitting in grbl's receive buffer and only blocks
+    on a response when the next line wouldn't fit, so grbl always has the next moves queued
+    instead of waiting on a round trip for every line
+    short lines are packed together and written in chunks, so each usb packet carries several moves
+
+    Methods:
+        send_line(line):
+            queue a line of gcode for grbl as soon as there is room for it in the receive buffer
+        flush():
+            write any queued lines to grbl
+        drain():
+            wait until grbl has acknowledged every line that was sent
+    """
+    def __init__(self, arduino):
+        """
+        initialize an empty streamer for a grbl connection
+
+        Args:
+            arduino (serial.Serial): serial connection to arduino/grbl for gantry control
+
+        Returns:
+            None
+        """
+        self.arduino = arduino
+        self.pending = deque() # byte counts of the lines grbl has received but not acknowledged yet
+        self.buf_used = 0 # total bytes currently sitting in grbl's receive buffer
+        self._out = bytearray() # lines queued for the next serial write
+
+    def _read_response(self):
+        """
+        read one response line from grbl
+        every 'ok' or 'error' acknowledges the oldest line still in the buffer and frees its space
+
+        Returns:
+            None
+        """
+        resp = self.arduino.readline().decode().strip()
+        if resp == "ok" or resp.startswith("error"):
+            self.buf_used -= self.pending.popleft()
+        if resp and resp != "ok":
+            print("[GRBL]", resp)
+
+    def send_line(self, line):
+        """
+        queue a line of gcode for grbl without waiting for it to be accepted
+        if the line doesn't fit in the receive buffer, responses are read until it does
+        queued lines are written once the chunk is full or a response is needed
+
+        Args:
+            line (str): the line of gcode to send to grbl
+
+        Returns:
+            None
+        """
+        data = (line + "\n").encode("utf-8")
+        # grbl's buffer holds 1 byte less than its size
+        if self.pending and self.buf_used + len(data) > GRBL_RX_BUFFER - 1:
+            # the queued lines have to reach grbl before it can acknowledge them
+            self.flush()
+            while self.pending and self.buf_used + len(data) > GRBL_RX_BUFFER - 1:
+                self._read_response()
+        if len(self._out) + len(data) > GRBL_WRITE_CHUNK:
+            self.flush()
+        # each line still takes its own slot, since grbl answers every newline with its own 'ok'
+        self._out += data
+        self.pending.append(len(data))
+        self.buf_used += len(data)
+
+    def flush(self):
+        """
+        write every queued line to grbl in a single serial write
+
+        Returns:
+            None
+        """
+        if self._out:
+            self.arduino.write(bytes(self._out))
+            self._out.clear()
+
+    def drain(self):
+        """
+        wait until grbl has acknowledged every line that was sent
+        required before waiting for idle, so leftover 'ok's aren't mistaken for later responses
+
+        Returns:
+            None
+        """
+        self.flush()
+        while self.pending:
+            self._read_response()
+
+def stream_gcode(lines, arduino, pi):
+    """
+    stream lines of gcode from the pi to the arduino using grbl's character counting protocol
+    the buffer is only drained before a servo command, where the gantry has to be idle anyway
 
     Args:
-        line (str): the line of gcode to send to grbl
-        pi (pigpio.pi): raspberry pi gpio controller for servo control
+        lines (iterable[str]): the lines of gcode to send to grbl, including servo_up/servo_down commands
         arduino (serial.Serial): serial connection to arduino/grbl for gantry control
-        next_line (str): the next line of gcode that will be sent to grbl
+        pi (pigpio.pi): raspberry pi gpio controller for servo control
 
     Returns:
         None
     """
-    line = line.strip()
-    if not line:
-        return
-
-    # servo control
-    if line == "servo_up":
-        wait_until_idle(arduino)
-        servo_up(pi)
-        return
-
-    if line == "servo_down":
-        wait_until_idle(arduino)
-        servo_down(pi)
-        return
+    streamer = GrblStreamer(arduino)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # servo control, let grbl finish everything it has queued before moving the servo
+        if line in ("servo_up", "servo_down"):
+            streamer.drain()
+            wait_until_idle(arduino)
+            if line == "servo_up":
+                servo_up(pi)
+            else:
+                servo_down(pi)
+            continue
 
-    # send normal gcode to arduino
-    arduino.write((line + "\n").encode("utf-8"))
+        # send normal gcode to arduino
+        streamer.send_line(line)
 
-    # wait for the line to be accepted
-    while True:
-        resp = arduino.readline().decode().strip()
-        if resp == "ok":
-            break
-        elif resp:
-            print("[GRBL]", resp)
+    # collect the remaining acknowledgements before the next command talks to grbl
+    streamer.drain()
 
-    # if the next move is a servo move, wait until the gantry is done
-    if next_line in ("servo_up", "servo_down"):
-        wait_until_idle(arduino)
+def play_engine_move(engine, board, skill, game, ponder=False):
+    """
+    have stockfish choose a move at the strength of the side it is playing
+    a single engine plays both colors, so its elo is set right before every search
+    while the position is still in the opening book, a book move is played without searching
 
-def run_game(pi, arduino):
+    Args:
+        engine (chess.engine.SimpleEngine): the stockfish process
+        board (chess.Board): the position to search
+        skill (int): elo of the side to move
+        game (object): identifies the current game so the engine is told when a new one starts
+        ponder (bool): keep searching the expected reply after the move is returned
+
+    Returns:
+        chess.engine.PlayResult: the result of the search, including the chosen move
+    """
+    # take a book move if there is one, the book raises IndexError once the game leaves it
+    if opening_book is not None:
+        try:
+            return chess.engine.PlayResult(opening_book.weighted_choice(board).move, None)
+        except IndexError:
+            pass
+    engine.configure({
+        "UCI_LimitStrength": True,
+        "UCI_Elo": skill
+    })
+    return engine.play(board, chess.engine.Limit(time=ENGINE_TIME), game=game, ponder=ponder)
+
+def run_game(pi, arduino, engine):
     """
     run a full round of chess configured by user input
 
     Args:
         pi (pigpio.pi): raspberry pi gpio controller for servo control
         arduino (serial.Serial): serial connection to arduino/grbl for gantry control
+        engine (chess.engine.SimpleEngine): stockfish process used for every computer move
 
     Returns:
         None
@@ -351,7 +494,7 @@ def run_game(pi, arduino):
         white_blinker.start()
         black_blinker.stop()
         # execute the premade moves
-        while game_mode.play_next_move(send_gcode_line):
+        while game_mode.play_next_move(stream_gcode):
             if turn%2 == 0:
                 white_blinker.stop()
                 black_blinker.start()
@@ -390,25 +533,13 @@ def run_game(pi, arduino):
     # display start board
     board_item.display_state()
 
-    # set up chess engines if needed
-    # placeholders required for later logic
-    white_engine = None
-    black_engine = None
-    if AUTO_PLAY or HUMAN_VS_HUMAN == False:
-        if AUTO_PLAY or HUMAN_PLAYS_WHITE == True:
-            black_engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
-            black_engine.configure({
-                "UCI_LimitStrength": True,
-                "UCI_Elo": BLACK_SKILL
-            })
-            print("black engine opened")
-        if AUTO_PLAY or HUMAN_PLAYS_WHITE == False:
-            white_engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
-            white_engine.configure({
-                "UCI_LimitStrength": True,
-                "UCI_Elo": WHITE_SKILL
-            })
-            print("white engine opened")
+    # the engine stays open between games and play_engine_move sets its elo before each search
+    # every search passes game=board_item, so python-chess sends ucinewgame on the first search of a new game
+    # instead of the engine being relaunched
+    # stockfish searches the next computer move on a worker thread while the gantry is still
+    # moving the previous piece, the search only needs the logical board after the move
+    search_pool = ThreadPoolExecutor(max_workers=1)
+    next_result = None # pending search for the upcoming computer move, if one was started early
 
     # main game loop
     turn = 1
@@ -427,30 +558,41 @@ def run_game(pi, arduino):
 
         if HUMAN_VS_HUMAN:
             # both players are human
+            # generate the legal moves once per turn so retries don't regenerate them
+            legal = {m.uci() for m in board_item.chess_board.legal_moves}
             while True:
                 move_uci = board_item.listen_for_valid_move(board_item.chess_board, speech_model)
                 if len(move_uci) not in (4, 5):
                     print("Invalid format. Use e2e4 or e7e8q.")
                     continue
                 try:
-                    move = chess.Move.from_uci(move_uci)
+                    chess.Move.from_uci(move_uci)
                 except ValueError:
                     print("Invalid notation. Try again.")
                     continue
-                if move not in board_item.chess_board.legal_moves:
+                if move_uci not in legal:
                     print("Illegal move. Try again.")
                     continue
                 break
 
         elif AUTO_PLAY or (color == "White" and not HUMAN_PLAYS_WHITE) or (color == "Black" and HUMAN_PLAYS_WHITE):
             # computer move
-            engine = white_engine if board_item.chess_board.turn == chess.WHITE else black_engine
-            result = engine.play(board_item.chess_board, chess.engine.Limit(time=ENGINE_TIME))
+            if next_result is not None:
+                # the search was started during the last gantry move, wait for it to finish
+                result = next_result.result()
+                next_result = None
+            else:
+                skill = WHITE_SKILL if board_item.chess_board.turn == chess.WHITE else BLACK_SKILL
+                # against a human, let stockfish keep thinking on the expected reply while the gantry moves
+                # and the human decides, the next search stops the ponder search and reuses its work
+                result = play_engine_move(engine, board_item.chess_board, skill, board_item, ponder=not AUTO_PLAY)
             move_uci = result.move.uci()
             print(f"{color} (Stockfish) plays: {move_uci}")
 
         else:
             # human move
+            # generate the legal moves once per turn so retries don't regenerate them
+            legal = {m.uci() for m in board_item.chess_board.legal_moves}
             while True:
                 # get input
                 move_uci = board_item.listen_for_valid_move(board_item.chess_board, speech_model)
@@ -460,28 +602,32 @@ def run_game(pi, arduino):
                     continue
                 try:
                     # pass the move to python chess to see if it can be parsed
-                    move = chess.Move.from_uci(move_uci)
+                    chess.Move.from_uci(move_uci)
                 except ValueError:
                     print("Invalid notation. Try again.")
                     continue
                 # check if the move is legal
-                if move not in board_item.chess_board.legal_moves:
+                if move_uci not in legal:
                     print("Illegal move. Try again.")
                     continue
                 break
 
+        # if stockfish plays the reply, start its search now on a copy of the board after this move
+        # so it runs while the gantry is moving the piece
+        if not HUMAN_VS_HUMAN:
+            ahead = board_item.chess_board.copy()
+            ahead.push(chess.Move.from_uci(move_uci))
+            if not ahead.is_game_over() and (AUTO_PLAY or (ahead.turn == chess.WHITE) != HUMAN_PLAYS_WHITE):
+                skill = WHITE_SKILL if ahead.turn == chess.WHITE else BLACK_SKILL
+                next_result = search_pool.submit(play_engine_move, engine, ahead, skill, board_item, ponder=not AUTO_PLAY)
+
         # plan and execute move
         move_path = board_item.plan_path(move_uci)
         # show the path if desired
         if SHOW_PATHS:
             board_item.display_paths(move_path)
-        # make the gcode
-        gcode_str = BoardItem.generate_gcode(move_path)
-        lines = gcode_str.splitlines()
-        # send the gcode
-        for i, line in enumerate(lines):
-            next_line = lines[i + 1] if i + 1 < len(lines) else None
-            send_gcode_line(line, arduino, pi, next_line)
+        # make the gcode and send it as it is generated
+        stream_gcode(BoardItem.generate_gcode_lines(move_path), arduino, pi)
         # move the piece for internal tracking
         board_item.move_piece(move_uci)
         # show the board
@@ -490,24 +636,18 @@ def run_game(pi, arduino):
         time.sleep(TURN_DELAY)
 
     # game over
+    search_pool.shutdown()
     white_led_off(pi)
     black_led_off(pi)
     print("\nGame over")
     print("Result:", board_item.chess_board.result())
-    if white_engine:
-        white_engine.quit()
-    if black_engine:
-        black_engine.quit()
 
     # board reset option
     resp = input("\nWould you like to reset the board to the starting position? (y/n): ").strip().lower()
     if resp == "y":
         print("Resetting board")
         gcode = board_item.reset_board_physical()
-        lines = gcode.splitlines()
-        for i, line in enumerate(lines):
-            next_line = lines[i + 1] if i + 1 < len(lines) else None
-            send_gcode_line(line, arduino, pi, next_line)
+        stream_gcode(gcode.splitlines(), arduino, pi)
         print("Reset complete")
     else:
         print("Board will not be reset.")
@@ -519,6 +659,7 @@ def init_hardware():
     Returns:
         pi (pigpio.pi): raspberry pi gpio controller for servo control
         arduino (serial.Serial): serial connection to arduino/grbl for gantry control
+        engine (chess.engine.SimpleEngine): stockfish process used for every computer move
     """
     # start the daemon required for pigpio and give time to configure
     start_pigpio_daemon()
@@ -531,20 +672,31 @@ def init_hardware():
     arduino = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
     time.sleep(2)
     arduino.reset_input_buffer()
+    # start a single chess engine once so games don't pay for launching stockfish
+    # it plays both colors, switching elo between searches, so only one hash table takes up the pi's memory
+    engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
+    engine.configure({
+        "Threads": ENGINE_THREADS,
+        "Hash": ENGINE_HASH
+    })
+    print("chess engine opened")
     # return objects so they can be passed to other functions
-    return pi, arduino
+    return pi, arduino, engine
 
-def shutdown_hardware(pi, arduino):
+def shutdown_hardware(pi, arduino, engine):
     """
     close all of the processes that were initialized at the beginning of the game
 
     Args:
         pi (pigpio.pi): raspberry pi gpio controller for servo control
         arduino (serial.Serial): serial connection to arduino/grbl for gantry control
+        engine (chess.engine.SimpleEngine): stockfish process used for every computer move
 
     Returns:
         None
     """
+    # close the chess engine
+    engine.quit()
     # close serial
     arduino.close()
     # stop sending servo commands